@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+# ---------------------------
+# Job model
+# Lives outside streamlit_app.py because Streamlit re-executes the main
+# script as a fresh __main__ on every rerun; a class defined there changes
+# identity between runs and st.cache_data can no longer pickle it.
+# slots keep per-posting memory low on large multi-board scans;
+# underscore fields are derived once per scan (see enrich_job / run_scan)
+# ---------------------------
+@dataclass(slots=True)
+class Job:
+    title: str
+    company: str
+    location: str
+    team: str
+    commitment: str
+    url: str
+    description: str
+    posted_at: Optional[datetime]  # naive UTC
+    source: str
+    tags: Tuple[str, ...] = ()
+    _ntitle: str = ""
+    _ncompany: str = ""
+    _nloc: str = ""
+    _hay: str = ""
+    _age: Optional[int] = None
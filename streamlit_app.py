@@ -1,9 +1,18 @@
 import streamlit as st
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
 import re
+import hashlib
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, quote_plus
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple, FrozenSet, Union
+
+from jobs import Job
 
 st.set_page_config(page_title="Howard's Senior QA Job Finder", layout="wide")
 
@@ -37,84 +46,167 @@ DEFAULT_COMPANY_BOARDS = [
     "https://boards.greenhouse.io/andurilindustries",
 ]
 
+# Sources whose posting URL uniquely identifies one posting (see dedupe_jobs)
+BOARD_SOURCES = ("Lever", "Greenhouse")
+
+# Bounds for user-entered keywords (see parse_keywords)
+MIN_KEYWORD_LEN = 2
+MAX_KEYWORD_LEN = 64
+
 USER_AGENT = {
     "User-Agent": "Mozilla/5.0 (compatible; JobFinderBot/1.0; +https://example.com/bot)"
 }
 
+# Shared keep-alive session; cached as a resource so it survives reruns,
+# pool size covers the scan thread pool. Responses are also persisted to
+# SQLite so a cold container (app woke from sleep) skips the network, and
+# the last good payload is served if a board briefly errors.
+@st.cache_resource
+def get_session() -> requests.Session:
+    session = CachedSession(
+        "jobcache.sqlite",
+        expire_after=60 * 30,
+        allowable_codes=(200,),
+        stale_if_error=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(USER_AGENT)
+    return session
+
+SESSION = get_session()
+
 # ---------------------------
 # Helpers
 # ---------------------------
 def normalize_text(s: str) -> str:
-    return re.sub(r"\s+", " ", s or "").strip().lower()
+    # str.split() collapses runs of whitespace in C; cheaper than re.sub on hot paths.
+    # casefold() rather than lower() so e.g. "Zürich"/"STRASSE" compare correctly
+    return " ".join((s or "").split()).casefold()
 
 def safe_get(url: str, timeout: int = 15) -> Optional[requests.Response]:
     try:
-        r = requests.get(url, headers=USER_AGENT, timeout=timeout)
+        r = SESSION.get(url, timeout=timeout)
         if r.status_code == 200:
             return r
     except Exception:
         pass
     return None
 
-def dedupe_jobs(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def enrich_job(job: Job) -> Job:
+    # Normalize once per (deduped) job; filters and sorts read these fields
+    job._ntitle = normalize_text(job.title)
+    job._ncompany = normalize_text(job.company)
+    job._nloc = normalize_text(job.location)
+    job._hay = normalize_text(" ".join([
+        job.title,
+        job.company,
+        job.location,
+        job.description,
+        " ".join(job.tags)
+    ]))
+    return job
+
+def dedupe_jobs(jobs: List[Job]) -> List[Job]:
+    # Board API posting URLs (Lever hostedUrl, Greenhouse absolute_url) are a
+    # strong key on their own. SerpAPI's url is often a company-level link
+    # shared by all of that company's postings, so those rows (and any row
+    # without a URL) use the (normalized title, company) fallback
     seen = set()
     out = []
     for j in jobs:
-        key = (normalize_text(j.get("title","")), normalize_text(j.get("company","")), j.get("url",""))
+        if j.url and j.source in BOARD_SOURCES:
+            key = ("u", j.url)
+        else:
+            key = ("tc", normalize_text(j.title), normalize_text(j.company))
         if key not in seen:
             seen.add(key)
             out.append(j)
     return out
 
-def keyword_match(job: Dict[str, Any], keywords: List[str]) -> bool:
-    hay = normalize_text(" ".join([
-        job.get("title",""),
-        job.get("company",""),
-        job.get("location",""),
-        job.get("description",""),
-        " ".join(job.get("tags",[]) or [])
-    ]))
-    return any(normalize_text(k) in hay for k in keywords if k.strip())
+def parse_keywords(txt: str) -> List[str]:
+    # One keyword per line, normalized and deduped. Length is bounded so a
+    # pasted job description can't blow up the alternation regex, and 1-char
+    # entries (which match nearly everything) are dropped.
+    kws = (normalize_text(k)[:MAX_KEYWORD_LEN].rstrip() for k in txt.splitlines())
+    return list(dict.fromkeys(k for k in kws if len(k) >= MIN_KEYWORD_LEN))
+
+def build_keyword_pattern(keywords: List[str]) -> Optional[re.Pattern]:
+    # One alternation scanned in C per job instead of a Python loop over keywords.
+    # Duplicates (preset + boosters overlap) are dropped, as is any keyword that
+    # contains a shorter one - the shorter alternative already matches it.
+    # Expects keywords already passed through normalize_text.
+    kws = sorted(dict.fromkeys(k for k in keywords if k), key=len)
+    kws = [k for i, k in enumerate(kws) if not any(shorter in k for shorter in kws[:i])]
+    if not kws:
+        return None
+    return re.compile("|".join(re.escape(k) for k in kws))
 
-def location_match(job: Dict[str, Any], locations: List[str], remote_ok: bool) -> bool:
-    loc = normalize_text(job.get("location",""))
+def keyword_match(job: Job, pattern: Optional[re.Pattern]) -> bool:
+    return pattern is not None and pattern.search(job._hay) is not None
+
+def location_match(job: Job, norm_locs: FrozenSet[str], remote_ok: bool) -> bool:
+    # norm_locs is pre-normalized once per scan
+    loc = job._nloc
     if remote_ok and ("remote" in loc or loc == ""):
         return True
-    return any(normalize_text(L) in loc for L in locations if L.strip())
+    # Board APIs usually return canonical strings, so exact hits are the common case
+    if loc in norm_locs:
+        return True
+    return any(L in loc for L in norm_locs)
 
-def days_ago(date_str: str) -> Optional[int]:
-    # expects ISO-ish date
+def parse_posted_at(date_str: Optional[str]) -> Optional[datetime]:
+    # expects ISO-ish date; returns naive UTC so it compares with utcnow()
+    if not date_str:
+        return None
     try:
-        dt = datetime.fromisoformat(date_str.replace("Z","").replace("+00:00",""))
-        return (datetime.utcnow() - dt).days
-    except Exception:
+        dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    except ValueError:
         return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def days_ago(posted: Union[datetime, str, None], now: Optional[datetime] = None) -> Optional[int]:
+    # fetchers store datetimes already; strings are parsed as a fallback.
+    # pass `now` when calling in a loop
+    dt = posted if isinstance(posted, datetime) else parse_posted_at(posted)
+    if dt is None:
+        return None
+    return ((now or datetime.utcnow()) - dt).days
 
 # ---------------------------
 # Lever Fetcher
 # Lever public endpoint: https://api.lever.co/v0/postings/{company}?mode=json
 # ---------------------------
 @st.cache_data(ttl=60 * 30, show_spinner=False)
-def fetch_lever(company_slug: str) -> List[Dict[str, Any]]:
+def fetch_lever(company_slug: str) -> List[Job]:
     url = f"https://api.lever.co/v0/postings/{company_slug}?mode=json"
     r = safe_get(url)
     if not r:
         return []
-    data = r.json()
+    data = orjson.loads(r.content)
     jobs = []
     for it in data:
-        jobs.append({
-            "title": it.get("text"),
-            "company": company_slug,
-            "location": (it.get("categories") or {}).get("location",""),
-            "team": (it.get("categories") or {}).get("team",""),
-            "commitment": (it.get("categories") or {}).get("commitment",""),
-            "url": it.get("hostedUrl") or it.get("applyUrl"),
-            "description": (it.get("descriptionPlain") or "")[:1200],
-            "posted_at": it.get("createdAt") and datetime.utcfromtimestamp(it["createdAt"]/1000).isoformat(),
-            "source": "Lever",
-            "tags": it.get("tags") or []
-        })
+        cats = it.get("categories") or {}
+        created = it.get("createdAt")
+        jobs.append(Job(
+            title=it.get("text") or "",
+            company=company_slug,
+            location=cats.get("location") or "",
+            team=cats.get("team") or "",
+            commitment=cats.get("commitment") or "",
+            url=it.get("hostedUrl") or it.get("applyUrl") or "",
+            description=(it.get("descriptionPlain") or "")[:1200],
+            posted_at=datetime.utcfromtimestamp(created/1000) if created else None,
+            source="Lever",
+            tags=tuple(it.get("tags") or ()),
+        ))
     return jobs
 
 # ---------------------------
@@ -123,26 +215,26 @@ def fetch_lever(company_slug: str) -> List[Dict[str, Any]]:
 # board is the greenhouse board slug
 # ---------------------------
 @st.cache_data(ttl=60 * 30, show_spinner=False)
-def fetch_greenhouse(board_slug: str) -> List[Dict[str, Any]]:
+def fetch_greenhouse(board_slug: str) -> List[Job]:
     url = f"https://boards-api.greenhouse.io/v1/boards/{board_slug}/jobs"
     r = safe_get(url)
     if not r:
         return []
-    data = r.json()
+    data = orjson.loads(r.content)
     jobs = []
     for it in data.get("jobs", []):
-        jobs.append({
-            "title": it.get("title"),
-            "company": board_slug,
-            "location": (it.get("location") or {}).get("name",""),
-            "team": (it.get("departments") or [{}])[0].get("name","") if it.get("departments") else "",
-            "commitment": it.get("commitment",""),
-            "url": it.get("absolute_url"),
-            "description": "",  # GH api doesn't include full desc in list endpoint
-            "posted_at": it.get("updated_at") or it.get("created_at"),
-            "source": "Greenhouse",
-            "tags": []
-        })
+        depts = it.get("departments")
+        jobs.append(Job(
+            title=it.get("title") or "",
+            company=board_slug,
+            location=(it.get("location") or {}).get("name") or "",
+            team=(depts[0].get("name") or "") if depts else "",
+            commitment=it.get("commitment") or "",
+            url=it.get("absolute_url") or "",
+            description="",  # GH api doesn't include full desc in list endpoint
+            posted_at=parse_posted_at(it.get("updated_at") or it.get("created_at")),
+            source="Greenhouse",
+        ))
     return jobs
 
 # ---------------------------
@@ -150,37 +242,43 @@ def fetch_greenhouse(board_slug: str) -> List[Dict[str, Any]]:
 # Requires your key; safe default is OFF unless key provided
 # ---------------------------
 @st.cache_data(ttl=60 * 30, show_spinner=False)
-def fetch_serpapi_jobs(query: str, location: str, api_key: str) -> List[Dict[str, Any]]:
-    if not api_key:
-        return []
+def _fetch_serpapi_cached(query: str, location: str, key_hash: str, _api_key: str) -> List[Job]:
+    # Cached on key_hash, not the secret (st.cache_data skips _-prefixed args).
+    # Errors raise so they are never memoized; the wrapper below swallows them.
     url = "https://serpapi.com/search.json"
     params = {
         "engine": "google_jobs",
         "q": query,
         "location": location,
-        "api_key": api_key,
+        "api_key": _api_key,
         "hl": "en",
     }
+    r = SESSION.get(url, params=params, timeout=20)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    jobs = []
+    for it in data.get("jobs_results", []):
+        ext = it.get("detected_extensions", {})
+        jobs.append(Job(
+            title=it.get("title") or "",
+            company=it.get("company_name") or "",
+            location=it.get("location") or "",
+            team="",
+            commitment=ext.get("schedule_type") or "",
+            url=it.get("related_links", [{}])[0].get("link") or it.get("apply_options", [{}])[0].get("link") or "",
+            description=(it.get("description") or "")[:1200],
+            posted_at=parse_posted_at(ext.get("posted_at")),
+            source="SerpAPI",
+        ))
+    return jobs
+
+def fetch_serpapi_jobs(query: str, location: str, api_key: str) -> List[Job]:
+    api_key = (api_key or "").strip()
+    if not api_key:
+        return []
+    key_hash = hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest()
     try:
-        r = requests.get(url, params=params, headers=USER_AGENT, timeout=20)
-        if r.status_code != 200:
-            return []
-        data = r.json()
-        jobs = []
-        for it in data.get("jobs_results", []):
-            jobs.append({
-                "title": it.get("title",""),
-                "company": it.get("company_name",""),
-                "location": it.get("location",""),
-                "team": "",
-                "commitment": it.get("detected_extensions", {}).get("schedule_type",""),
-                "url": it.get("related_links", [{}])[0].get("link") or it.get("apply_options", [{}])[0].get("link"),
-                "description": (it.get("description","") or "")[:1200],
-                "posted_at": it.get("detected_extensions", {}).get("posted_at",""),
-                "source": "SerpAPI",
-                "tags": []
-            })
-        return jobs
+        return _fetch_serpapi_cached(query, location, key_hash, api_key)
     except Exception:
         return []
 
@@ -199,11 +297,34 @@ def parse_board_url(url: str) -> Tuple[str, str]:
         return ("Greenhouse", path[0])
     return ("Unknown", "")
 
+def format_job_card(job: Job) -> str:
+    title = job.title or "(no title)"
+    parts = [
+        f"### [{title}]({job.url})" if job.url else f"### {title}",
+        f"**Company:** {job.company}  |  **Location:** {job.location or 'n/a'}  |  **Source:** {job.source}",
+    ]
+    if job._age is not None:
+        parts.append(f":gray[Posted ~{job._age} days ago]")
+    meta = " • ".join(x for x in (job.team, job.commitment) if x)
+    if meta:
+        parts.append(f":gray[{meta}]")
+    if job.description:
+        parts.append(job.description)
+    return "\n\n".join(parts)
+
 def build_linkedin_search_link(query: str, location: str) -> str:
     q = quote_plus(query)
     l = quote_plus(location)
     return f"https://www.linkedin.com/jobs/search/?keywords={q}&location={l}"
 
+@st.cache_data(show_spinner=False)
+def build_linkedin_links(queries: Tuple[str, ...], locations: Tuple[str, ...]) -> List[List[Tuple[str, str]]]:
+    # (label, url) pairs per query; inputs rarely change between reruns
+    return [
+        [(f"{k} • {L}", build_linkedin_search_link(k, L)) for L in locations]
+        for k in queries
+    ]
+
 # ---------------------------
 # UI
 # ---------------------------
@@ -218,23 +339,26 @@ with st.sidebar:
         value="\n".join(DEFAULT_KEYWORDS),
         height=180
     )
-    keywords = [k.strip() for k in keywords_txt.splitlines() if k.strip()]
+    # Normalized (and deduped) once here; downstream matching assumes it
+    keywords = parse_keywords(keywords_txt)
 
     tech_txt = st.text_area(
         "Tech / Domain Boosters (optional)",
         value="\n".join(DEFAULT_TECH),
         height=140
     )
-    tech_keywords = [k.strip() for k in tech_txt.splitlines() if k.strip()]
+    tech_keywords = parse_keywords(tech_txt)
 
     locations = st.multiselect(
         "Locations to include",
         DEFAULT_LOCATIONS,
         default=["Remote", "San Jose, CA"]
     )
+    norm_locations = list(dict.fromkeys(normalize_text(L) for L in locations if L.strip()))
     remote_ok = st.checkbox("Include Remote roles", value=True)
 
     posted_within_days = st.slider("Posted within (days)", 1, 60, 14)
+    top_n = st.number_input("Max results", 25, 500, 100)
 
     st.divider()
     st.subheader("Company Boards")
@@ -271,6 +395,8 @@ PRESET_SYSTEMS = [
     "Integration & Test Engineer",
 ]
 
+PAGE_SIZE = 25
+
 if "last_jobs" not in st.session_state:
     st.session_state.last_jobs = []
 
@@ -278,41 +404,54 @@ def run_scan(preset: List[str]):
     all_jobs = []
     diagnostics = {"Lever": 0, "Greenhouse": 0, "SerpAPI": 0, "Unknown": 0}
 
-    # Fetch boards
+    # Fetch boards (and SerpAPI) concurrently; each call is blocking HTTP I/O
+    boards = []
     for url in board_urls:
         src, slug = parse_board_url(url)
         if src == "Lever":
-            jobs = fetch_lever(slug)
-            diagnostics["Lever"] += len(jobs)
-            all_jobs.extend(jobs)
+            boards.append((src, slug, fetch_lever))
         elif src == "Greenhouse":
-            jobs = fetch_greenhouse(slug)
-            diagnostics["Greenhouse"] += len(jobs)
-            all_jobs.extend(jobs)
+            boards.append((src, slug, fetch_greenhouse))
         else:
             diagnostics["Unknown"] += 1
 
-    # Optional SerpAPI aggregation
+    # Optional SerpAPI aggregation. One broad query (the preset's lead title)
+    # recalls more than a quoted OR chain; keyword_match does the precision.
+    serp_q = None
     if use_serpapi and serpapi_key:
-        q = " OR ".join([f'"{k}"' for k in preset])
-        jobs = fetch_serpapi_jobs(q, serpapi_location, serpapi_key)
-        diagnostics["SerpAPI"] += len(jobs)
-        all_jobs.extend(jobs)
+        serp_q = preset[0]
+
+    # Threads rather than an asyncio/httpx fan-out: the fetchers are sync
+    # functions wrapped by st.cache_data (which can't cache coroutines) and
+    # route through the requests-cache Session, and the pool is tiny.
+    n_tasks = len(boards) + (1 if serp_q else 0)
+    with ThreadPoolExecutor(max_workers=max(1, min(16, n_tasks))) as ex:
+        futures = {ex.submit(fetcher, slug): src for src, slug, fetcher in boards}
+        if serp_q:
+            futures[ex.submit(fetch_serpapi_jobs, serp_q, serpapi_location, serpapi_key)] = "SerpAPI"
+        # Collect in submission (board) order so dedupe and sort ties are stable
+        for fut, src in futures.items():
+            jobs = fut.result()
+            diagnostics[src] += len(jobs)
+            all_jobs.extend(jobs)
 
-    all_jobs = dedupe_jobs(all_jobs)
+    all_jobs = [enrich_job(j) for j in dedupe_jobs(all_jobs)]
 
     # Filter by keywords + locations + recency
-    combined_keywords = preset + tech_keywords
+    combined_keywords = [normalize_text(k) for k in preset] + tech_keywords
+    kw_pattern = build_keyword_pattern(combined_keywords)
+    norm_locs = frozenset(norm_locations)
+    now = datetime.utcnow()
     filtered = []
     for j in all_jobs:
-        if not keyword_match(j, combined_keywords):
+        if not keyword_match(j, kw_pattern):
+            continue
+        if not location_match(j, norm_locs, remote_ok):
             continue
-        if not location_match(j, locations, remote_ok):
+        # Parsed once here; the recency sort and cards reuse it
+        j._age = days_ago(j.posted_at, now) if j.posted_at else None
+        if j._age is not None and j._age > posted_within_days:
             continue
-        if j.get("posted_at"):
-            age = days_ago(j["posted_at"])
-            if age is not None and age > posted_within_days:
-                continue
         filtered.append(j)
 
     st.session_state.last_jobs = filtered
@@ -347,38 +486,24 @@ with colB:
 with colA:
     st.subheader(f"✅ Matches ({len(jobs)})")
 
-    # Quick sort
+    # Quick sort; only the top N are rendered, so partial-sort with a heap
+    total = len(jobs)
     sort_by = st.selectbox("Sort by", ["Most recent (if known)", "Company A–Z", "Title A–Z"])
     if sort_by == "Company A–Z":
-        jobs = sorted(jobs, key=lambda x: normalize_text(x.get("company","")))
+        jobs = heapq.nsmallest(top_n, jobs, key=lambda x: x._ncompany)
     elif sort_by == "Title A–Z":
-        jobs = sorted(jobs, key=lambda x: normalize_text(x.get("title","")))
+        jobs = heapq.nsmallest(top_n, jobs, key=lambda x: x._ntitle)
     else:
-        def sort_recent(j):
-            a = days_ago(j.get("posted_at","")) if j.get("posted_at") else 9999
-            return a
-        jobs = sorted(jobs, key=sort_recent)
-
-    # Display cards
-    for j in jobs:
-        title = j.get("title","(no title)")
-        company = j.get("company","")
-        location = j.get("location","")
-        url = j.get("url","")
-        source = j.get("source","")
-        posted = j.get("posted_at","")
-        age = days_ago(posted) if posted else None
-
+        jobs = heapq.nsmallest(top_n, jobs, key=lambda x: x._age if x._age is not None else 9999)
+    if total > top_n:
+        st.caption(f"Showing top {top_n} of {total}")
+
+    # Display cards, one page at a time; each card is a single markdown element
+    n_pages = max(1, (len(jobs) + PAGE_SIZE - 1) // PAGE_SIZE)
+    page = st.number_input("Page", 1, n_pages, 1) if n_pages > 1 else 1
+    for j in jobs[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
         with st.container(border=True):
-            st.markdown(f"### [{title}]({url})" if url else f"### {title}")
-            st.write(f"**Company:** {company}  |  **Location:** {location or 'n/a'}  |  **Source:** {source}")
-            if age is not None:
-                st.caption(f"Posted ~{age} days ago")
-            if j.get("team") or j.get("commitment"):
-                st.caption(f"{j.get('team','')} {('• ' + j.get('commitment')) if j.get('commitment') else ''}".strip())
-
-            if j.get("description"):
-                st.write(j["description"])
+            st.markdown(format_job_card(j))
 
     if len(jobs) == 0:
         st.warning("No matches yet. Add more boards, widen locations, or enable SerpAPI.")
@@ -389,7 +514,8 @@ with colA:
 st.divider()
 st.subheader("🔗 LinkedIn One-Click Searches (safe click-out)")
 link_cols = st.columns(3)
-for idx, k in enumerate(PRESET_MAIN):
+linkedin_links = build_linkedin_links(tuple(PRESET_MAIN), tuple(locations[:2] or ["Remote"]))
+for idx, links in enumerate(linkedin_links):
     with link_cols[idx % 3]:
-        for L in locations[:2] or ["Remote"]:
-            st.link_button(f"{k} • {L}", build_linkedin_search_link(k, L), use_container_width=True)
\ No newline at end of file
+        for label, url in links:
+            st.link_button(label, url, use_container_width=True)
\ No newline at end of file